@@ -1,13 +1,9 @@
 #!/usr/bin/env python3
 
-import os
+import glob
 import sys
 import argparse
 import logging
-from datetime import datetime
-
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.wifi_scanner import WiFiScanner
 from src.driver_manager import DriverManager
@@ -70,9 +66,9 @@ class WiFiAutomationTool:
         """Test if WiFi is working properly"""
         self.logger.info("Testing WiFi functionality...")
         
-        # Check if WiFi interface is up
-        result = os.system("iwconfig 2>/dev/null | grep -q 'IEEE 802.11'")
-        if result == 0:
+        # Check if WiFi interface is up (sysfs read, no shell/iwconfig fork)
+        has_wifi = bool(glob.glob('/sys/class/net/*/wireless'))
+        if has_wifi:
             print("✅ WiFi interface is active")
             # Test actual connection
             self.scanner.scan_networks(detailed=True)
@@ -80,15 +76,18 @@ class WiFiAutomationTool:
             print("❌ WiFi interface not found or inactive")
             self.driver_manager.troubleshoot_wifi()
 
-def main():
+def get_argparser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
     parser = argparse.ArgumentParser(description='WiFi Automation Tool for Kali Linux')
     parser.add_argument('--scan-only', action='store_true', help='Only scan for networks')
     parser.add_argument('--install-drivers', action='store_true', help='Only install drivers')
     parser.add_argument('--fix-errors', action='store_true', help='Try to fix common WiFi errors')
     parser.add_argument('--system-repair', action='store_true', help='Run system repair only')
     parser.add_argument('--health-check', action='store_true', help='Run system health check only')
-    
-    args = parser.parse_args()
+    return parser
+
+def main():
+    args = get_argparser().parse_args()
     
     tool = WiFiAutomationTool()
     
@@ -1,123 +1,289 @@
+import asyncio
+import concurrent.futures
+import functools
 import subprocess
 import logging
 import os
 import re
-import json
 from typing import List, Dict
 
+from src.utils import bulk_check_packages
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Fire-and-forget commands dump their output here instead of allocating pipes
+_QUIET = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+@functools.lru_cache(maxsize=1)
+def _load_offline_drivers() -> Dict:
+    """Load the offline driver database once per process"""
+    offline_db = {
+        'atheros': {
+            'packages': ['firmware-atheros', 'firmware-linux-nonfree'],
+            'modules': ['ath9k', 'ath9k_common', 'ath9k_hw'],
+            'devices': ['Atheros', 'AR93', 'AR94', 'AR95']
+        },
+        'realtek': {
+            'packages': ['firmware-realtek', 'firmware-linux-nonfree'],
+            'modules': ['rtl8192cu', 'rtl8xxxu', 'rt2800usb'],
+            'devices': ['Realtek', 'RTL81', 'RTL82']
+        },
+        'intel': {
+            'packages': ['firmware-iwlwifi', 'firmware-linux'],
+            'modules': ['iwlwifi', 'iwlmvm'],
+            'devices': ['Intel', 'Centrino', 'Wireless-AC', 'iwlwifi']
+        },
+        'broadcom': {
+            'packages': ['firmware-brcm80211', 'b43-fwcutter'],
+            'modules': ['brcmsmac', 'b43'],
+            'devices': ['Broadcom', 'BCM43']
+        }
+    }
+
+    # Try to load from file; json is only needed here and this loader
+    # runs once per process, so import it lazily
+    import json
+
+    try:
+        with open('drivers/common_drivers.json', 'r') as f:
+            offline_db.update(json.load(f))
+    except FileNotFoundError:
+        pass  # Optional file; the built-in database is enough
+    except (OSError, json.JSONDecodeError):
+        logging.getLogger(__name__).warning(
+            "Could not load offline driver database file"
+        )
+
+    return offline_db
+
+
+@functools.lru_cache(maxsize=1)
+def _device_tag_index():
+    """Build one regex alternation and tag->family map over all device tags"""
+    tag_to_family = {}
+    for family, info in _load_offline_drivers().items():
+        for tag in info.get('devices', []):
+            tag_to_family.setdefault(tag.lower(), family)
+
+    # Longest tags first so e.g. 'rtl8188' wins over 'rtl81'
+    pattern = re.compile('|'.join(
+        re.escape(tag) for tag in sorted(tag_to_family, key=len, reverse=True)
+    ))
+    return pattern, tag_to_family
+
+
+@functools.lru_cache(maxsize=1)
+def _device_tag_automaton():
+    """Optional Aho-Corasick automaton over the device tags"""
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for family, info in _load_offline_drivers().items():
+        for tag in info.get('devices', []):
+            automaton.add_word(tag.lower(), family)
+    automaton.make_automaton()
+    return automaton
+
+
+def _workers() -> int:
+    """Thread count from the allowed CPU set (cgroup quotas included)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    # Module loading is I/O-bound on udev, so cap the fan-out at 8
+    return max(2, min(8, cpus))
+
+
+_pm_singleton = None
+
+
+def _get_pm():
+    """Lazily construct and share a single PackageManager"""
+    global _pm_singleton
+    if _pm_singleton is None:
+        from src.package_manager import PackageManager
+        _pm_singleton = PackageManager()
+    return _pm_singleton
+
+
+def _loaded_kernel_modules() -> set:
+    """Read the set of currently loaded module names from /proc/modules"""
+    try:
+        with open('/proc/modules') as f:
+            return {line.split(maxsplit=1)[0] for line in f}
+    except OSError:
+        return set()
+
+
+_modprobe_loaded: set = set()
+
+
+def _modprobe_once(module: str) -> bool:
+    """Run modprobe for a module, skipping repeats that already loaded.
+
+    Only successes are memoized: a failure may just mean the driver
+    package isn't installed yet, and the post-install reload (or a later
+    troubleshoot_wifi) must be able to retry it.
+    """
+    if module in _modprobe_loaded:
+        return True
+    try:
+        subprocess.run(['modprobe', module], check=True, **_QUIET)
+        _modprobe_loaded.add(module)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def _match_driver_family(hardware_lower: str) -> str:
+    """Map a hardware description to a driver family in one linear scan"""
+    automaton = _device_tag_automaton()
+    if automaton is not None:
+        return next(
+            (family for _, family in automaton.iter(hardware_lower)),
+            'generic'
+        )
+
+    tag_regex, tag_to_family = _device_tag_index()
+    match = tag_regex.search(hardware_lower)
+    return tag_to_family[match.group(0)] if match else 'generic'
+
+
 class DriverManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.drivers_installed = False
-        self.offline_drivers = self._load_offline_drivers()
-    
-    def _load_offline_drivers(self) -> Dict:
-        """Load offline driver database"""
-        offline_db = {
-            'atheros': {
-                'packages': ['firmware-atheros', 'firmware-linux-nonfree'],
-                'modules': ['ath9k', 'ath9k_common', 'ath9k_hw'],
-                'devices': ['Atheros', 'AR93', 'AR94', 'AR95']
-            },
-            'realtek': {
-                'packages': ['firmware-realtek', 'firmware-linux-nonfree'],
-                'modules': ['rtl8192cu', 'rtl8xxxu', 'rt2800usb'],
-                'devices': ['Realtek', 'RTL81', 'RTL82']
-            },
-            'intel': {
-                'packages': ['firmware-iwlwifi', 'firmware-linux'],
-                'modules': ['iwlwifi', 'iwlmvm'],
-                'devices': ['Intel', 'Centrino', 'Wireless-AC']
-            },
-            'broadcom': {
-                'packages': ['firmware-brcm80211', 'b43-fwcutter'],
-                'modules': ['brcmsmac', 'b43'],
-                'devices': ['Broadcom', 'BCM43']
-            }
-        }
-        
-        # Try to load from file
-        try:
-            with open('drivers/common_drivers.json', 'r') as f:
-                file_db = json.load(f)
-                offline_db.update(file_db)
-        except:
-            self.logger.warning("Could not load offline driver database file")
-        
-        return offline_db
+        self.offline_drivers = _load_offline_drivers()
     
     def install_required_drivers(self):
         """Install required WiFi drivers with fallback support"""
         try:
-            print("🔍 Detecting WiFi hardware...")
-            
-            # Detect WiFi hardware
-            hardware_info = self._detect_wifi_hardware()
-            
-            if not hardware_info:
-                print("❌ No WiFi hardware detected")
-                self._install_generic_drivers()
-                return
-            
-            print(f"📟 Detected WiFi hardware: {hardware_info}")
-            
+            asyncio.run(self._install_required_drivers_async())
+        except Exception as e:
+            self.logger.error(f"Error installing drivers: {e}")
+            self._emergency_driver_installation()
+
+    async def _install_required_drivers_async(self):
+        """Drive the install flow, overlapping the slow independent steps"""
+        print("🔍 Detecting WiFi hardware...")
+
+        # The online install needs fresh apt metadata and the hardware
+        # info; both are slow and independent, so run them together
+        detect_task = asyncio.create_task(self._detect_wifi_hardware_async())
+        apt_task = asyncio.create_task(
+            asyncio.to_thread(self._refresh_apt_metadata)
+        )
+
+        hardware_info = await detect_task
+
+        if not hardware_info:
+            print("❌ No WiFi hardware detected")
+            await apt_task
+            self._install_generic_drivers()
+            return
+
+        print(f"📟 Detected WiFi hardware: {hardware_info}")
+
+        # Speculatively load modules while apt finishes; modprobe of an
+        # already-loaded module is a no-op, and a module that fails here
+        # is retried by the post-install reload once apt has shipped it
+        module_task = asyncio.create_task(
+            asyncio.to_thread(self._load_wifi_modules)
+        )
+
+        try:
+            await apt_task
+
             # Try online installation first
-            if self._try_online_installation(hardware_info):
+            if await asyncio.to_thread(self._try_online_installation, hardware_info):
                 self.drivers_installed = True
                 print("✅ Online driver installation completed")
                 return
-            
+
             # Fallback to offline installation
             print("🌐 Online installation failed, trying offline methods...")
-            if self._try_offline_installation(hardware_info):
+            if await asyncio.to_thread(self._try_offline_installation, hardware_info):
                 self.drivers_installed = True
                 print("✅ Offline driver installation completed")
                 return
-            
+
             # Last resort: generic drivers
             print("🔄 Trying generic driver installation...")
-            self._install_generic_drivers()
-            
+            await asyncio.to_thread(self._install_generic_drivers)
+        finally:
+            await module_task
+
+    def _refresh_apt_metadata(self):
+        """Refresh apt package lists so the install steps start warm"""
+        try:
+            subprocess.run(['apt-get', 'update'], timeout=180, **_QUIET)
         except Exception as e:
-            self.logger.error(f"Error installing drivers: {e}")
-            self._emergency_driver_installation()
+            self.logger.warning(f"apt metadata refresh failed: {e}")
     
     def _try_online_installation(self, hardware_info: str) -> bool:
         """Try online driver installation"""
-        from src.package_manager import PackageManager
-        
-        package_manager = PackageManager()
         driver_packages = self._get_driver_packages(hardware_info)
-        
+
         print(f"📥 Attempting to install: {', '.join(driver_packages)}")
-        
-        success_count = 0
-        for package in driver_packages:
-            if package_manager.install_package_with_fallback(package):
-                success_count += 1
-            else:
-                self.logger.warning(f"Failed to install: {package}")
-        
+
+        failed_packages = self._batch_install_packages(driver_packages)
+        for package in failed_packages:
+            self.logger.warning(f"Failed to install: {package}")
+
+        success_count = len(driver_packages) - len(failed_packages)
+
         # Load modules after installation
         self._load_wifi_modules()
-        
+
         return success_count >= len(driver_packages) * 0.5  # At least 50% success
+
+    def _filter_missing_packages(self, packages: List[str]) -> List[str]:
+        """Drop packages dpkg already reports installed, in one query"""
+        # The shared bulk probe forks dpkg-query once and seeds the same
+        # (package, status-mtime) cache the single-package check reads
+        statuses = bulk_check_packages(list(packages))
+        return [package for package in packages if not statuses[package]]
+
+    def _batch_install_packages(self, packages: List[str]) -> List[str]:
+        """Install packages in a single apt batch, retrying failures individually"""
+        # Skip apt entirely when everything is already installed
+        packages = self._filter_missing_packages(packages)
+        if not packages:
+            return []
+
+        try:
+            result = subprocess.run(
+                ['apt-get', 'install', '-y', '--no-install-recommends'] + packages,
+                capture_output=True,
+                text=True,
+                timeout=600,
+                env={**os.environ, 'DEBIAN_FRONTEND': 'noninteractive'}
+            )
+            if result.returncode == 0:
+                return []
+        except Exception as e:
+            self.logger.warning(f"Batch installation failed: {e}")
+
+        # Batch failed: fall back to per-package installs so one bad
+        # package does not block the rest
+        package_manager = _get_pm()
+
+        return [
+            package for package in packages
+            if not package_manager.install_package_with_fallback(package)
+        ]
     
     def _try_offline_installation(self, hardware_info: str) -> bool:
         """Try offline driver installation"""
         print("🔧 Attempting offline driver solutions...")
         
-        # Identify hardware type
-        hardware_lower = hardware_info.lower()
-        driver_type = None
-        
-        for driver_key, driver_info in self.offline_drivers.items():
-            if any(device in hardware_lower for device in driver_info['devices']):
-                driver_type = driver_key
-                break
-        
-        if not driver_type:
-            driver_type = 'generic'
+        # Identify hardware type with the shared tag matcher
+        driver_type = _match_driver_family(hardware_info.lower())
         
         print(f"🛠️  Identified driver type: {driver_type}")
         
@@ -151,11 +317,15 @@ class DriverManager:
         print(f"⚙️  Attempting source compilation for {driver_type}...")
         
         try:
-            # Install build essentials if possible
+            # Install build essentials if possible. The running kernel
+            # release has to be resolved here: '$(uname -r)' would be
+            # passed to apt verbatim since no shell is involved.
+            kernel_release = os.uname().release
             subprocess.run([
-                'apt', 'install', '-y', '--allow-unauthenticated',
-                'build-essential', 'linux-headers-$(uname -r)', 'git', 'dkms'
-            ], capture_output=True, timeout=300)
+                'apt-get', 'install', '-y', '--no-install-recommends',
+                'build-essential', f'linux-headers-{kernel_release}',
+                'git', 'dkms'
+            ], timeout=300, **_QUIET)
             
             # Try to compile common open-source drivers
             if driver_type == 'realtek':
@@ -172,20 +342,29 @@ class DriverManager:
     
     def _compile_realtek_drivers(self) -> bool:
         """Compile Realtek drivers from source"""
+        source_cache = '/var/cache/wifi-automation/rtl8188eu'
         try:
-            # Try RTL8188EU driver
-            subprocess.run([
-                'git', 'clone', 'https://github.com/lwfinger/rtl8188eu.git'
-            ], check=True, timeout=120)
-            
-            os.chdir('rtl8188eu')
-            subprocess.run(['make'], check=True, timeout=300)
-            subprocess.run(['make', 'install'], check=True, timeout=120)
-            subprocess.run(['modprobe', '8188eu'], check=True)
-            
-            os.chdir('..')
+            # Try RTL8188EU driver; reuse a cached shallow clone so
+            # repeat runs skip the network fetch
+            if not os.path.isdir(source_cache):
+                subprocess.run([
+                    'git', 'clone', '--depth=1',
+                    'https://github.com/lwfinger/rtl8188eu.git', source_cache
+                ], check=True, timeout=120, **_QUIET)
+
+            # cwd= keeps the build out of the process working directory
+            # so concurrent callers are unaffected
+            subprocess.run(
+                ['make', f'-j{os.cpu_count() or 1}'],
+                check=True, timeout=300, cwd=source_cache, **_QUIET
+            )
+            subprocess.run(
+                ['make', 'install'],
+                check=True, timeout=120, cwd=source_cache, **_QUIET
+            )
+            subprocess.run(['modprobe', '8188eu'], check=True, **_QUIET)
             return True
-        except:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
             return False
     
     def _compile_ath9k_drivers(self) -> bool:
@@ -198,12 +377,12 @@ class DriverManager:
             # Try to install broadcom-sta-dkms
             subprocess.run([
                 'apt', 'install', '-y', 'broadcom-sta-dkms'
-            ], check=True, timeout=300)
+            ], check=True, timeout=300, **_QUIET)
             
-            subprocess.run(['modprobe', '-r', 'b44', 'b43', 'bcma'], check=False)
-            subprocess.run(['modprobe', 'wl'], check=True)
+            subprocess.run(['modprobe', '-r', 'b44', 'b43', 'bcma'], check=False, **_QUIET)
+            subprocess.run(['modprobe', 'wl'], check=True, **_QUIET)
             return True
-        except:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
             return False
     
     def _install_generic_drivers(self):
@@ -218,16 +397,10 @@ class DriverManager:
             'net-tools',
             'iw'
         ]
-        
-        from src.package_manager import PackageManager
-        package_manager = PackageManager()
-        
-        for package in generic_packages:
-            try:
-                package_manager.install_package_with_fallback(package)
-            except Exception as e:
-                self.logger.warning(f"Failed to install {package}: {e}")
-        
+
+        for package in self._batch_install_packages(generic_packages):
+            self.logger.warning(f"Failed to install {package}")
+
         self._load_wifi_modules()
     
     def _emergency_driver_installation(self):
@@ -240,51 +413,58 @@ class DriverManager:
             'rtl8192cu', 'rtl8xxxu', 'rt2800usb', 'rt2x00usb',
             'iwlwifi', 'iwlmvm', 'brcmsmac', 'b43', 'wl'
         ]
-        
-        for module in all_modules:
-            self._load_kernel_module(module)
+
+        self._load_modules_parallel(all_modules)
         
         # Reset network
-        subprocess.run(['rfkill', 'unblock', 'all'], check=False)
-        subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False)
+        subprocess.run(['rfkill', 'unblock', 'all'], check=False, **_QUIET)
+        subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False, **_QUIET)
     
     def _detect_wifi_hardware(self) -> str:
         """Detect WiFi hardware"""
         try:
-            # Check PCI devices
-            pci_result = subprocess.run(
-                ['lspci'], 
-                capture_output=True, 
-                text=True
-            )
-            
-            wifi_devices = []
-            for line in pci_result.stdout.split('\n'):
-                if 'Network controller' in line or 'Wireless' in line.lower():
-                    wifi_devices.append(line.strip())
-                    self.logger.info(f"Found WiFi device: {line.strip()}")
-            
-            # Check USB devices
-            usb_result = subprocess.run(
-                ['lsusb'], 
-                capture_output=True, 
-                text=True
-            )
-            
-            for line in usb_result.stdout.split('\n'):
-                if 'Wireless' in line or '802.11' in line:
-                    wifi_devices.append(line.strip())
-                    self.logger.info(f"Found USB WiFi: {line.strip()}")
-            
-            return ', '.join(wifi_devices) if wifi_devices else "Unknown"
-            
+            return asyncio.run(self._detect_wifi_hardware_async())
         except Exception as e:
             self.logger.error(f"Error detecting hardware: {e}")
             return "Unknown"
+
+    async def _detect_wifi_hardware_async(self) -> str:
+        """Detect WiFi hardware by running lspci and lsusb concurrently"""
+
+        def is_pci_wifi(line: str) -> bool:
+            return 'Network controller' in line or 'wireless' in line.lower()
+
+        def is_usb_wifi(line: str) -> bool:
+            return 'Wireless' in line or '802.11' in line
+
+        pci_devices, usb_devices = await asyncio.gather(
+            self._filter_command_lines(['lspci'], is_pci_wifi),
+            self._filter_command_lines(['lsusb'], is_usb_wifi)
+        )
+
+        for device in pci_devices:
+            self.logger.info(f"Found WiFi device: {device}")
+        for device in usb_devices:
+            self.logger.info(f"Found USB WiFi: {device}")
+
+        wifi_devices = pci_devices + usb_devices
+        return ', '.join(wifi_devices) if wifi_devices else "Unknown"
+
+    async def _filter_command_lines(self, cmd: List[str], keep) -> List[str]:
+        """Run a command and collect matching lines without buffering all output"""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE
+        )
+        matches = []
+        async for raw_line in proc.stdout:
+            line = raw_line.decode(errors='replace')
+            if keep(line):
+                matches.append(line.strip())
+        await proc.wait()
+        return matches
     
     def _get_driver_packages(self, hardware_info: str) -> List[str]:
         """Get appropriate driver packages based on hardware"""
-        hardware_lower = hardware_info.lower()
         packages = [
             'firmware-linux',
             'firmware-linux-nonfree',
@@ -292,15 +472,10 @@ class DriverManager:
             'wpasupplicant'
         ]
         
-        # Hardware-specific packages
-        if 'atheros' in hardware_lower:
-            packages.extend(['firmware-atheros'])
-        elif 'realtek' in hardware_lower:
-            packages.extend(['firmware-realtek', 'firmware-realtek'])
-        elif 'intel' in hardware_lower or 'iwlwifi' in hardware_lower:
-            packages.extend(['firmware-iwlwifi'])
-        elif 'broadcom' in hardware_lower:
-            packages.extend(['firmware-brcm80211', 'b43-fwcutter'])
+        # Hardware-specific packages from the matched driver family
+        family = _match_driver_family(hardware_info.lower())
+        if family in self.offline_drivers:
+            packages.extend(self.offline_drivers[family]['packages'])
         
         return list(set(packages))  # Remove duplicates
     
@@ -311,19 +486,27 @@ class DriverManager:
             'ath10k_pci', 'rt2800usb', 'rt2x00usb',
             'iwlwifi', 'rtl8192cu', 'rtl8xxxu'
         ]
-        
-        for module in modules:
-            self._load_kernel_module(module)
-    
+
+        self._load_modules_parallel(modules)
+
+    def _load_modules_parallel(self, modules: List[str]):
+        """Load independent kernel modules concurrently"""
+        # One /proc/modules read elides modprobe for anything already loaded
+        loaded = _loaded_kernel_modules()
+        modules = [module for module in modules if module not in loaded]
+        if not modules:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=_workers()) as executor:
+            list(executor.map(self._load_kernel_module, modules))
+
     def _load_kernel_module(self, module: str) -> bool:
-        """Load a kernel module"""
-        try:
-            subprocess.run(['modprobe', module], check=True)
+        """Load a kernel module (memoized; repeat calls skip the modprobe fork)"""
+        if _modprobe_once(module):
             self.logger.info(f"Loaded module: {module}")
             return True
-        except subprocess.CalledProcessError:
-            self.logger.debug(f"Could not load module: {module}")
-            return False
+        self.logger.debug(f"Could not load module: {module}")
+        return False
     
     def troubleshoot_wifi(self):
         """Troubleshoot WiFi issues"""
@@ -331,17 +514,17 @@ class DriverManager:
         
         try:
             # Restart network services
-            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=True)
-            subprocess.run(['systemctl', 'restart', 'wpa_supplicant'], check=True)
+            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=True, **_QUIET)
+            subprocess.run(['systemctl', 'restart', 'wpa_supplicant'], check=True, **_QUIET)
             
             # Reload kernel modules
             self._load_wifi_modules()
             
             # Reset WiFi interface
-            subprocess.run(['rfkill', 'unblock', 'all'], check=True)
+            subprocess.run(['rfkill', 'unblock', 'all'], check=True, **_QUIET)
             
             # Bring interfaces up
-            subprocess.run(['ip', 'link', 'set', 'wlan0', 'up'], check=False)
+            subprocess.run(['ip', 'link', 'set', 'wlan0', 'up'], check=False, **_QUIET)
             
             print("✅ WiFi troubleshooting completed")
             
@@ -1,44 +1,103 @@
+import glob
 import logging
+import re
+import functools
 import subprocess
 import sys
 import os
 import traceback
 from typing import Dict, Any
 
+from src.package_manager import APT, _APT_ENV
+
+# Fire-and-forget fix commands don't need their output; dropping it at
+# the kernel keeps chatty tools like apt from blocking on pipe buffers
+_QUIET = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+
+@functools.lru_cache(maxsize=512)
+def _owner_of(file_path: str, dpkg_info_mtime: int) -> str:
+    """Package owning file_path, or '' if unknown.
+
+    dpkg -S scans the whole /var/lib/dpkg/info tree (seconds on a full
+    install), so answers are cached keyed on the tree's mtime — a
+    package install or removal bumps it and invalidates stale entries.
+    """
+    result = subprocess.run(
+        ['dpkg', '-S', file_path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode == 0:
+        return result.stdout.split(':')[0]
+    return ''
+
 class ErrorHandler:
+    # One compiled scan buckets the error message for the general
+    # analysis path; the matched group names the repair subsystem. The
+    # earliest keyword in the message wins, not a fixed bucket priority
+    _KEYWORD_RE = re.compile(
+        r'(?P<pkg>broken|dependency|dpkg)'
+        r'|(?P<net>network|connection|unreachable)'
+        r'|(?P<drv>driver|firmware|module)'
+        r'|(?P<res>memory|space|disk)',
+        re.IGNORECASE
+    )
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-    
+        # Manager instances built lazily on the first error that needs
+        # them and reused across fix paths
+        self._pkg_mgr = None
+        self._drv_mgr = None
+        # Ordered: PermissionError, FileNotFoundError, and
+        # ConnectionError subclass OSError, so OSError must come last
+        self._dispatch = [
+            (PermissionError, self._fix_permission_issues),
+            (FileNotFoundError, self._fix_missing_files),
+            (subprocess.CalledProcessError, self._fix_subprocess_errors),
+            (ConnectionError, self._fix_connection_issues),
+            (OSError, self._fix_os_errors)
+        ]
+
+    def _pm(self):
+        """Shared PackageManager, created on first use"""
+        if self._pkg_mgr is None:
+            from src.package_manager import PackageManager
+            self._pkg_mgr = PackageManager()
+        return self._pkg_mgr
+
+    def _dm(self):
+        """Shared DriverManager, created on first use"""
+        if self._drv_mgr is None:
+            from src.driver_manager import DriverManager
+            self._drv_mgr = DriverManager()
+        return self._drv_mgr
+
     def handle_error(self, error: Exception, context: Dict[str, Any] = None):
         """Handle different types of errors with context"""
         error_msg = str(error)
         error_type = type(error).__name__
-        
+
         self.logger.error(f"Error {error_type}: {error_msg}")
         self.logger.debug(f"Traceback: {traceback.format_exc()}")
-        
+
         print(f"❌ Error ({error_type}): {error_msg}")
         print("🛠️ Attempting automated repair...")
-        
+
         # Use context for better error handling
         if context and 'operation' in context:
             print(f"   Operation: {context['operation']}")
-        
-        # Map error types to specific handlers
-        error_handlers = {
-            'PermissionError': self._fix_permission_issues,
-            'FileNotFoundError': self._fix_missing_files,
-            'subprocess.CalledProcessError': self._fix_subprocess_errors,
-            'OSError': self._fix_os_errors,
-            'ConnectionError': self._fix_connection_issues
-        }
-        
-        # Try specific handler first
-        for error_pattern, handler in error_handlers.items():
-            if error_pattern in error_type or error_pattern in error_msg:
+
+        # Dispatch on the exception type itself — no string matching,
+        # and a FileNotFoundError whose message mentions "permission"
+        # can no longer pick the wrong handler
+        for exc_cls, handler in self._dispatch:
+            if isinstance(error, exc_cls):
                 if handler(context):
                     return
-        
+                break
+
         # Fallback to general analysis
         self._analyze_and_fix_general(error_msg, context)
     
@@ -47,13 +106,17 @@ class ErrorHandler:
         print("🔑 Fixing permission issues...")
         try:
             # Ensure proper permissions for our tool
-            subprocess.run(['chmod', '+x', 'install.sh'], check=True)
-            subprocess.run(['chmod', '+x', 'main.py'], check=True)
-            subprocess.run(['chmod', '+x', 'recovery.sh'], check=True)
+            subprocess.run(['chmod', '+x', 'install.sh'], check=True, **_QUIET)
+            subprocess.run(['chmod', '+x', 'main.py'], check=True, **_QUIET)
+            subprocess.run(['chmod', '+x', 'recovery.sh'], check=True, **_QUIET)
             
-            # Fix common permission issues
-            subprocess.run(['chown', '-R', 'root:root', '/etc/NetworkManager/'], check=False)
-            subprocess.run(['chmod', '600', '/etc/NetworkManager/system-connections/*'], check=False)
+            # Fix common permission issues. The wildcard has to be
+            # expanded here — without a shell, chmod would receive the
+            # literal '*' path and never match anything.
+            subprocess.run(['chown', '-R', 'root:root', '/etc/NetworkManager/'], check=False, **_QUIET)
+            connections = glob.glob('/etc/NetworkManager/system-connections/*')
+            if connections:
+                subprocess.run(['chmod', '600'] + connections, check=False, **_QUIET)
             
             print("✅ Permission issues fixed")
             return True
@@ -90,9 +153,8 @@ class ErrorHandler:
         """Fix subprocess execution errors"""
         print("⚙️ Fixing subprocess execution issues...")
         try:
-            from src.package_manager import PackageManager
-            package_manager = PackageManager()
-            
+            package_manager = self._pm()
+
             # Fix package management first
             package_manager.fix_package_management()
             
@@ -114,15 +176,22 @@ class ErrorHandler:
         """Fix OS-level errors"""
         print("💻 Fixing OS-level issues...")
         try:
-            # Check and repair filesystem
-            subprocess.run(['fsck', '-f', '/'], check=False)
-            
+            # fsck on a mounted rw root is a slow no-op at best; only
+            # run a read-only check when root is actually mounted ro
+            mount_opts = subprocess.run(
+                ['findmnt', '-n', '-o', 'OPTIONS', '/'],
+                capture_output=True,
+                text=True
+            )
+            if 'ro' in mount_opts.stdout.strip().split(','):
+                subprocess.run(['fsck', '-n', '/'], check=False, **_QUIET)
+
             # Reload kernel modules
-            subprocess.run(['modprobe', '-r', 'ath9k'], check=False)
-            subprocess.run(['modprobe', 'ath9k'], check=False)
+            subprocess.run(['modprobe', '-r', 'ath9k'], check=False, **_QUIET)
+            subprocess.run(['modprobe', 'ath9k'], check=False, **_QUIET)
             
             # Restart system daemons
-            subprocess.run(['systemctl', 'daemon-reload'], check=True)
+            subprocess.run(['systemctl', 'daemon-reload'], check=True, **_QUIET)
             
             print("✅ OS-level issues fixed")
             return True
@@ -135,15 +204,15 @@ class ErrorHandler:
         print("🌐 Fixing connection issues...")
         try:
             # Restart networking
-            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=True)
-            subprocess.run(['systemctl', 'restart', 'networking'], check=True)
+            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=True, **_QUIET)
+            subprocess.run(['systemctl', 'restart', 'networking'], check=True, **_QUIET)
             
             # Reset network configuration
-            subprocess.run(['nmcli', 'networking', 'off'], check=False)
-            subprocess.run(['nmcli', 'networking', 'on'], check=False)
+            subprocess.run(['nmcli', 'networking', 'off'], check=False, **_QUIET)
+            subprocess.run(['nmcli', 'networking', 'on'], check=False, **_QUIET)
             
             # Flush routes and renew
-            subprocess.run(['ip', 'route', 'flush', 'cache'], check=False)
+            subprocess.run(['ip', 'route', 'flush', 'cache'], check=False, **_QUIET)
             
             print("✅ Connection issues fixed")
             return True
@@ -154,60 +223,82 @@ class ErrorHandler:
     def _analyze_and_fix_general(self, error_msg: str, context: Dict[str, Any] = None):
         """Analyze error message and apply general fixes"""
         print("🔍 Analyzing error pattern...")
-        
-        if any(word in error_msg.lower() for word in ['broken', 'dependency', 'dpkg']):
+
+        match = self._KEYWORD_RE.search(error_msg)
+        bucket = match.lastgroup if match else None
+
+        if bucket == 'pkg':
             self._fix_package_system()
-        elif any(word in error_msg.lower() for word in ['network', 'connection', 'unreachable']):
+        elif bucket == 'net':
             self._fix_network_system()
-        elif any(word in error_msg.lower() for word in ['driver', 'firmware', 'module']):
+        elif bucket == 'drv':
             self._fix_driver_system()
-        elif any(word in error_msg.lower() for word in ['memory', 'space', 'disk']):
+        elif bucket == 'res':
             self._fix_resource_issues()
         else:
-            self._general_system_repair()
+            self._general_system_repair(error_msg)
     
     def _fix_package_system(self):
         """Fix package system issues"""
         print("📦 Repairing package system...")
-        from src.package_manager import PackageManager
-        package_manager = PackageManager()
-        package_manager.fix_package_management()
+        self._pm().fix_package_management()
     
     def _fix_network_system(self):
         """Fix network system issues"""
         print("🌐 Repairing network system...")
-        subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False)
-        subprocess.run(['rfkill', 'unblock', 'all'], check=False)
+        subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False, **_QUIET)
+        subprocess.run(['rfkill', 'unblock', 'all'], check=False, **_QUIET)
     
     def _fix_driver_system(self):
         """Fix driver system issues"""
         print("🔧 Repairing driver system...")
-        from src.driver_manager import DriverManager
-        driver_manager = DriverManager()
-        driver_manager.troubleshoot_wifi()
+        self._dm().troubleshoot_wifi()
     
     def _fix_resource_issues(self):
         """Fix resource issues"""
         print("💾 Freeing up system resources...")
-        subprocess.run(['apt', 'clean'], check=False)
-        subprocess.run(['apt', 'autoclean'], check=False)
-        subprocess.run(['journalctl', '--vacuum-size=100M'], check=False)
+        subprocess.run(APT + ['clean'], check=False, env=_APT_ENV, **_QUIET)
+        subprocess.run(APT + ['autoclean'], check=False, env=_APT_ENV, **_QUIET)
+        subprocess.run(['journalctl', '--vacuum-size=100M'], check=False, **_QUIET)
     
-    def _general_system_repair(self):
+    def _general_system_repair(self, error_msg: str = ''):
         """General system repair"""
+        # The full apt cascade takes minutes and rarely has anything to
+        # do with the error; only run it when the error points at the
+        # package system or the operator opts in explicitly.
+        heavy = (
+            os.environ.get('WIFI_TOOL_HEAVY_FIX') == '1'
+            or any(word in error_msg.lower() for word in ('apt', 'dpkg'))
+        )
+        if heavy:
+            self._heavy_system_repair()
+        else:
+            self._light_system_repair()
+
+    def _light_system_repair(self):
+        """Cheap recovery steps that finish in seconds"""
+        print("🛠️ Performing light system repair...")
+        self.logger.info("Skipping apt repair; set WIFI_TOOL_HEAVY_FIX=1 to force it")
+        subprocess.run(['rfkill', 'unblock', 'all'], check=False, **_QUIET)
+        subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False, **_QUIET)
+        print("✅ Light system repair completed")
+
+    def _heavy_system_repair(self):
+        """Full apt update/upgrade/cleanup cascade"""
         print("🛠️ Performing general system repair...")
         try:
-            # Update system
-            subprocess.run(['apt', 'update'], check=False)
-            subprocess.run(['apt', 'upgrade', '-y'], check=False)
-            
+            # Update system; skipping translation downloads is a cheap
+            # apt speedup
+            subprocess.run(APT + ['update', '-o', 'Acquire::Languages=none'], check=False, env=_APT_ENV, **_QUIET)
+            subprocess.run(APT + ['upgrade', '-y'], check=False, env=_APT_ENV, **_QUIET)
+
             # Clean up
-            subprocess.run(['apt', 'autoremove', '-y'], check=False)
-            subprocess.run(['apt', 'autoclean'], check=False)
-            
+            subprocess.run(APT + ['autoremove', '-y'], check=False, env=_APT_ENV, **_QUIET)
+            subprocess.run(APT + ['autoclean'], check=False, env=_APT_ENV, **_QUIET)
+
             # Restart services
-            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False)
-            
+            subprocess.run(['systemctl', 'restart', 'NetworkManager'], check=False, **_QUIET)
+
             print("✅ General system repair completed")
         except Exception as e:
             self.logger.error(f"General repair failed: {e}")
@@ -216,15 +307,11 @@ class ErrorHandler:
         """Reinstall package related to missing file"""
         try:
             # Find which package owns the file
-            result = subprocess.run(
-                ['dpkg', '-S', file_path],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                package = result.stdout.split(':')[0]
+            info_mtime = os.stat('/var/lib/dpkg/info').st_mtime_ns
+            package = _owner_of(file_path, info_mtime)
+
+            if package:
                 print(f"📦 Reinstalling package: {package}")
-                subprocess.run(['apt', 'install', '--reinstall', '-y', package], check=True)
+                subprocess.run(APT + ['install', '--reinstall', '-y', package], check=True, env=_APT_ENV, **_QUIET)
         except:
             self.logger.warning(f"Could not determine package for {file_path}")
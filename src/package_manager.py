@@ -1,15 +1,64 @@
+import concurrent.futures
+import functools
+import glob
 import subprocess
 import logging
 import os
 import re
+import shutil
+import signal
 import tempfile
 import json
 import time
+from pathlib import Path
 from typing import Tuple, List, Dict
 
+# Output of fire-and-forget repair commands is never read; sending it to
+# /dev/null avoids blocking the child on a full pipe or the terminal
+_QUIET = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+
+# apt-get without the pty progress machinery: no per-package redraws,
+# no color escapes, noticeably faster long installs than plain apt
+APT = ['apt-get', '-q', '-o', 'Dpkg::Use-Pty=0', '-o', 'APT::Color=0']
+
+# Keeps debconf from stopping a batch install to ask questions
+_APT_ENV = {**os.environ, 'DEBIAN_FRONTEND': 'noninteractive'}
+
+# Same invocation for shell-side batches
+_APT_SH = ' '.join(APT)
+
+def _keyring_state() -> tuple:
+    """Stat fingerprint of the apt keyrings, used as a cache key"""
+    paths = glob.glob('/etc/apt/trusted.gpg.d/*') + ['/etc/apt/trusted.gpg']
+    state = []
+    for path in sorted(paths):
+        try:
+            state.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(state)
+
+
+@functools.lru_cache(maxsize=4)
+def _gpg_keys_valid(keyring_state: tuple) -> bool:
+    """Run apt-key list once per keyring state"""
+    result = subprocess.run(
+        ['apt-key', 'list'],
+        capture_output=True,
+        text=True
+    )
+    return result.returncode == 0 and 'Kali Linux' in result.stdout
+
+
 class PackageManager:
+    # Seconds to trust a previous apt update before re-running it
+    _APT_UPDATE_TTL = 60
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._apt_ok_val = None
+        self._apt_ok_ts = 0.0
+        self._installed = set()
     
     def check_system_health(self) -> Dict:
         """Comprehensive system health check"""
@@ -23,25 +72,28 @@ class PackageManager:
             'overall_health': False
         }
         
+        # The probes are independent and mostly blocked on subprocesses
+        # or the network, so run them together and join on the slowest
+        probes = {
+            'apt_working': self._test_apt_functionality,
+            'sources_valid': self._check_sources_list,
+            'gpg_keys_valid': self._check_gpg_keys,
+            'network_connected': self._test_repository_connectivity,
+            'disk_space_adequate': self._check_disk_space,
+            'dependencies_ok': self._check_broken_dependencies
+        }
+
         try:
-            # Check if APT is working
-            health_status['apt_working'] = self._test_apt_functionality()
-            
-            # Check repository sources
-            health_status['sources_valid'] = self._check_sources_list()
-            
-            # Check GPG keys
-            health_status['gpg_keys_valid'] = self._check_gpg_keys()
-            
-            # Check network connectivity to repositories
-            health_status['network_connected'] = self._test_repository_connectivity()
-            
-            # Check disk space
-            health_status['disk_space_adequate'] = self._check_disk_space()
-            
-            # Check for broken dependencies
-            health_status['dependencies_ok'] = self._check_broken_dependencies()
-            
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(probes)) as executor:
+                futures = {
+                    name: executor.submit(probe)
+                    for name, probe in probes.items()
+                }
+                health_status.update({
+                    name: future.result()
+                    for name, future in futures.items()
+                })
+
             # Overall health
             health_status['overall_health'] = all([
                 health_status['apt_working'],
@@ -58,36 +110,54 @@ class PackageManager:
 
     def _test_apt_functionality(self) -> bool:
         """Test if APT is functioning properly"""
+        # Health checks feed into fix-then-recheck loops; don't re-run
+        # the expensive apt update within the TTL window
+        now = time.monotonic()
+        if self._apt_ok_val is not None and now - self._apt_ok_ts < self._APT_UPDATE_TTL:
+            return self._apt_ok_val
+
         try:
             result = subprocess.run(
-                ['apt', 'update'],
+                APT + ['update'],
                 capture_output=True,
                 text=True,
-                timeout=120
+                timeout=120,
+                env=_APT_ENV
             )
-            return result.returncode == 0 or "Reading package lists" in result.stdout
+            ok = result.returncode == 0 or "Reading package lists" in result.stdout
         except Exception as e:
             self.logger.error(f"APT functionality test failed: {e}")
             return False
 
+        self._apt_ok_val = ok
+        self._apt_ok_ts = time.monotonic()
+        return ok
+
     def _check_sources_list(self) -> bool:
         """Check if sources.list is valid"""
+        kali_patterns = ('kali-rolling', 'http.kali.org', 'kali.download')
+
+        # Include the sources.list.d fragments (both one-line and
+        # deb822 style) so the check reflects modern apt layouts
+        sources = (
+            ['/etc/apt/sources.list']
+            + glob.glob('/etc/apt/sources.list.d/*.list')
+            + glob.glob('/etc/apt/sources.list.d/*.sources')
+        )
+
         try:
-            if not os.path.exists('/etc/apt/sources.list'):
-                return False
-            
-            with open('/etc/apt/sources.list', 'r') as f:
-                content = f.read()
-            
-            # Check for Kali repositories
-            kali_patterns = [
-                'kali-rolling',
-                'http.kali.org',
-                'kali.download'
-            ]
-            
-            return any(pattern in content for pattern in kali_patterns)
-            
+            for source in sources:
+                try:
+                    with open(source, 'r') as f:
+                        # Line-by-line with an early return: the first
+                        # Kali entry ends the scan
+                        for line in f:
+                            if any(pattern in line for pattern in kali_patterns):
+                                return True
+                except OSError:
+                    continue
+            return False
+
         except Exception as e:
             self.logger.error(f"Sources list check failed: {e}")
             return False
@@ -95,34 +165,47 @@ class PackageManager:
     def _check_gpg_keys(self) -> bool:
         """Check if GPG keys are valid"""
         try:
-            result = subprocess.run(
-                ['apt-key', 'list'],
-                capture_output=True,
-                text=True
+            # The Kali keyring package installs files with 'kali' in the
+            # name; spotting one answers the check with two globs and no
+            # gpg fork at all
+            keyrings = (
+                glob.glob('/etc/apt/trusted.gpg.d/*kali*')
+                + glob.glob('/usr/share/keyrings/*kali*')
             )
-            return result.returncode == 0 and 'Kali Linux' in result.stdout
+            if keyrings:
+                return True
+
+            # No named keyring — fall back to the cached apt-key scan,
+            # which still covers keys merged into the legacy trusted.gpg
+            return _gpg_keys_valid(_keyring_state())
         except Exception as e:
             self.logger.error(f"GPG keys check failed: {e}")
             return False
 
     def _test_repository_connectivity(self) -> bool:
         """Test connectivity to Kali repositories"""
+        repositories = [
+            'http.kali.org',
+            'kali.download',
+            'archive-4.kali.org'
+        ]
+
+        def ping(repo: str) -> bool:
+            result = subprocess.run(
+                ['ping', '-c', '1', '-W', '3', repo],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            return result.returncode == 0
+
+        # Probe all mirrors at once and return on the first success
+        # instead of paying up to 3s per mirror serially
         try:
-            repositories = [
-                'http.kali.org',
-                'kali.download',
-                'archive-4.kali.org'
-            ]
-            
-            for repo in repositories:
-                result = subprocess.run(
-                    ['ping', '-c', '1', '-W', '3', repo],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    return True
-            
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(repositories)) as executor:
+                futures = [executor.submit(ping, repo) for repo in repositories]
+                for future in concurrent.futures.as_completed(futures):
+                    if future.result():
+                        return True
             return False
         except Exception as e:
             self.logger.error(f"Repository connectivity test failed: {e}")
@@ -131,19 +214,9 @@ class PackageManager:
     def _check_disk_space(self, required_mb: int = 500) -> bool:
         """Check if there's enough disk space"""
         try:
-            result = subprocess.run(
-                ['df', '/'],
-                capture_output=True,
-                text=True
-            )
-            
-            lines = result.stdout.strip().split('\n')
-            if len(lines) > 1:
-                available = int(lines[1].split()[3])  # Available in KB
-                available_mb = available / 1024
-                return available_mb >= required_mb
-            
-            return False
+            # statvfs via shutil — no df fork, no text parsing
+            free_mb = shutil.disk_usage('/').free // (1024 * 1024)
+            return free_mb >= required_mb
         except Exception as e:
             self.logger.error(f"Disk space check failed: {e}")
             return False
@@ -151,103 +224,102 @@ class PackageManager:
     def _check_broken_dependencies(self) -> bool:
         """Check for broken dependencies"""
         try:
-            result = subprocess.run(
-                ['dpkg', '--audit'],
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0 and 'broken' not in result.stdout.lower()
-        except Exception as e:
+            # dpkg --audit parses every stanza of the status database
+            # just to print the broken ones; we only need a yes/no, and
+            # one linear pass over the raw bytes answers that
+            with open('/var/lib/dpkg/status', 'rb') as f:
+                for line in f:
+                    if line.startswith(b'Status:') and (
+                        b'reinstreq' in line or b'half-' in line
+                    ):
+                        return False
+            return True
+        except OSError as e:
             self.logger.error(f"Broken dependencies check failed: {e}")
             return False
 
+    # Recovery steps joined into one shell invocation; ';' keeps later
+    # steps running even when an earlier one fails
+    _FIX_STEPS = [
+        ('remove_lock_files', 'rm -f /var/lib/dpkg/lock* /var/lib/apt/lists/lock /var/cache/apt/archives/lock'),
+        ('configure_pending', 'dpkg --configure -a'),
+        ('fix_broken', f'{_APT_SH} --fix-broken install -y'),
+        ('clean_cache', f'{_APT_SH} clean && {_APT_SH} autoclean && {_APT_SH} autoremove -y'),
+        ('update_lists', f'{_APT_SH} update'),
+        ('fix_missing', f'{_APT_SH} install -f -y')
+    ]
+
+    def _wait_for_dpkg_lock(self, path: str = '/var/lib/dpkg/lock-frontend',
+                            timeout: float = 30.0) -> bool:
+        """Poll until the dpkg frontend lock is free, or timeout"""
+        # A non-blocking flock probe returns the moment the previous
+        # dpkg run releases the lock, instead of guessing with sleeps
+        import fcntl
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                return True  # No lock file, nothing holds it
+            except OSError:
+                return False
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                return True
+            except (OSError, BlockingIOError):
+                time.sleep(0.05)
+            finally:
+                os.close(fd)
+        self.logger.warning(f"Timed out waiting for dpkg lock {path}")
+        return False
+
     def fix_package_management(self):
         """Fix common package management issues"""
         self.logger.info("Fixing package management issues...")
-        
-        fixes = [
-            self._remove_lock_files,
-            self._fix_broken_packages,
-            self._clean_apt_cache,
-            self._update_package_lists,
-            self._fix_missing_dependencies
-        ]
-        
-        for fix_func in fixes:
-            try:
-                fix_func()
-                time.sleep(2)  # Brief pause between fixes
-            except Exception as e:
-                self.logger.warning(f"Fix {fix_func.__name__} failed: {e}")
+
+        # Wait for any in-flight apt/dpkg run to release its lock so the
+        # batch below doesn't trip over 'could not get lock' failures
+        self._wait_for_dpkg_lock()
+
+        # One fork runs the whole recovery sequence instead of a dozen
+        # subprocess spawns with sleep pacing between them
+        script = ' ; '.join(
+            f"echo '=== {name} ===' ; {cmd}" for name, cmd in self._FIX_STEPS
+        )
+
+        try:
+            result = subprocess.run(
+                ['bash', '-c', script],
+                capture_output=True,
+                text=True,
+                timeout=600,
+                env=_APT_ENV
+            )
+            for line in result.stdout.splitlines():
+                if line.startswith('=== '):
+                    self.logger.info(f"Fix step: {line.strip('= ')}")
+        except subprocess.TimeoutExpired:
+            self.logger.warning("Package management fix timed out")
+        except Exception as e:
+            self.logger.warning(f"Package management fix failed: {e}")
 
     def _remove_lock_files(self):
         """Remove APT lock files"""
         lock_files = [
             '/var/lib/dpkg/lock',
-            '/var/lib/dpkg/lock-frontend', 
+            '/var/lib/dpkg/lock-frontend',
             '/var/lib/apt/lists/lock',
             '/var/cache/apt/archives/lock'
         ]
-        
-        for lock_file in lock_files:
-            if os.path.exists(lock_file):
-                self.logger.info(f"Removing lock file: {lock_file}")
-                os.remove(lock_file)
-
-    def _fix_broken_packages(self):
-        """Fix broken packages"""
-        self.logger.info("Fixing broken packages...")
-        
-        commands = [
-            ['dpkg', '--configure', '-a'],
-            ['apt', '--fix-broken', 'install', '-y'],
-            ['apt', 'install', '--fix-missing', '-y']
-        ]
-        
-        for cmd in commands:
-            try:
-                subprocess.run(cmd, check=True, timeout=300)
-                self.logger.info(f"Successfully ran: {' '.join(cmd)}")
-            except subprocess.CalledProcessError as e:
-                self.logger.warning(f"Command failed: {' '.join(cmd)} - {e}")
-            except subprocess.TimeoutExpired:
-                self.logger.warning(f"Command timed out: {' '.join(cmd)}")
 
-    def _clean_apt_cache(self):
-        """Clean APT cache"""
-        self.logger.info("Cleaning APT cache...")
-        
-        commands = [
-            ['apt', 'clean'],
-            ['apt', 'autoclean'],
-            ['apt', 'autoremove', '-y']
-        ]
-        
-        for cmd in commands:
+        # unlink(missing_ok=True) skips the exists() stat — one syscall
+        # per lock instead of two, and no TOCTOU window
+        for lock_file in lock_files:
             try:
-                subprocess.run(cmd, check=True, timeout=120)
-            except subprocess.CalledProcessError as e:
-                self.logger.warning(f"Cache clean failed: {e}")
-
-    def _update_package_lists(self):
-        """Update package lists"""
-        self.logger.info("Updating package lists...")
-        try:
-            subprocess.run(['apt', 'update'], check=True, timeout=180)
-        except subprocess.CalledProcessError as e:
-            self.logger.warning(f"Package list update failed: {e}")
-
-    def _fix_missing_dependencies(self):
-        """Fix missing dependencies"""
-        self.logger.info("Fixing missing dependencies...")
-        try:
-            subprocess.run(
-                ['apt', 'install', '-f', '-y'],
-                check=True,
-                timeout=300
-            )
-        except subprocess.CalledProcessError as e:
-            self.logger.warning(f"Missing dependencies fix failed: {e}")
+                Path(lock_file).unlink(missing_ok=True)
+            except PermissionError as e:
+                self.logger.warning(f"Could not remove lock file {lock_file}: {e}")
 
     def repair_system_health(self, health_status: Dict):
         """Repair system based on health status"""
@@ -265,30 +337,45 @@ class PackageManager:
         if not health_status['disk_space_adequate']:
             self._free_up_disk_space()
 
+    def _kill_matching(self, needles: set):
+        """SIGTERM processes whose comm name is in needles"""
+        # One /proc walk replaces two pkill -f forks, and matching on
+        # comm (the basename) can't hit paths that merely contain 'apt'
+        for pid in os.listdir('/proc'):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f'/proc/{pid}/comm') as f:
+                    name = f.read().strip()
+                if name in needles:
+                    self.logger.info(f"Terminating stuck process {name} ({pid})")
+                    os.kill(int(pid), signal.SIGTERM)
+            except OSError:
+                continue
+
     def _emergency_apt_repair(self):
         """Emergency APT repair"""
         self.logger.info("Performing emergency APT repair...")
-        
+
         # Kill any stuck processes
-        subprocess.run(['pkill', '-f', 'apt'], capture_output=True)
-        subprocess.run(['pkill', '-f', 'dpkg'], capture_output=True)
-        
+        self._kill_matching({'apt', 'apt-get', 'dpkg'})
+
         # Remove all lock files
         self._remove_lock_files()
         
         # Force dpkg repair
-        subprocess.run(['dpkg', '--configure', '-a', '--force-all'], check=False)
+        subprocess.run(['dpkg', '--configure', '-a', '--force-all'], check=False, **_QUIET)
         
         # Complete system repair
         repair_commands = [
-            ['apt', 'update', '--allow-unauthenticated'],
-            ['apt', 'install', '--fix-broken', '--yes', '--allow-downgrades'],
-            ['apt', 'dist-upgrade', '--yes']
+            APT + ['update', '--allow-unauthenticated'],
+            APT + ['install', '--fix-broken', '--yes', '--allow-downgrades'],
+            APT + ['dist-upgrade', '--yes']
         ]
         
         for cmd in repair_commands:
             try:
-                subprocess.run(cmd, timeout=300, check=False)
+                subprocess.run(cmd, timeout=300, check=False, env=_APT_ENV, **_QUIET)
             except subprocess.TimeoutExpired:
                 self.logger.warning("Command timed out during emergency repair")
 
@@ -319,112 +406,94 @@ deb http://http.kali.org/kali kali-rolling main contrib non-free
     def _fix_gpg_keys(self):
         """Fix Kali GPG keys"""
         self.logger.info("Fixing Kali GPG keys...")
-        
-        key_commands = [
-            ['wget', '-q', '-O', '-', 'https://archive.kali.org/archive-key.asc'],
-            ['apt-key', 'add', '-']
-        ]
-        
+
         try:
-            # Download and add key
-            result1 = subprocess.run(key_commands[0], capture_output=True, text=True)
-            if result1.returncode == 0:
-                result2 = subprocess.run(
-                    key_commands[1], 
-                    input=result1.stdout,
-                    text=True,
-                    capture_output=True
-                )
-                if result2.returncode == 0:
-                    self.logger.info("Successfully added Kali GPG key")
-                    return
-        
+            # Fetch in-process instead of forking wget, and dearmor into
+            # trusted.gpg.d directly — apt-key is deprecated and its gpg
+            # run re-parses every keyring on each call
+            import urllib.request
+            with urllib.request.urlopen(
+                'https://archive.kali.org/archive-key.asc', timeout=30
+            ) as response:
+                key_bytes = response.read()
+
+            # --batch --yes: without them gpg prompts before overwriting
+            # an existing key file and dies on the missing tty, breaking
+            # every refresh after the first
+            result = subprocess.run(
+                ['gpg', '--batch', '--yes', '--dearmor', '-o',
+                 '/etc/apt/trusted.gpg.d/kali-archive-key.gpg'],
+                input=key_bytes,
+                capture_output=True
+            )
+            if result.returncode == 0:
+                self.logger.info("Successfully added Kali GPG key")
+                return
+
         except Exception as e:
             self.logger.warning(f"GPG key download failed: {e}")
         
         # Fallback: Update keyring package
         try:
             subprocess.run([
-                'apt', 'install', '--reinstall', '-y',
+                *APT, 'install', '--reinstall', '-y',
                 'kali-archive-keyring'
-            ], check=True, timeout=120)
+            ], check=True, timeout=120, env=_APT_ENV, **_QUIET)
         except Exception as e:
             self.logger.error(f"Keyring package reinstall failed: {e}")
 
     def _free_up_disk_space(self):
         """Free up disk space"""
         self.logger.info("Freeing up disk space...")
-        
-        cleanup_commands = [
-            ['apt', 'clean'],
-            ['apt', 'autoclean'], 
-            ['apt', 'autoremove', '-y'],
-            ['rm', '-rf', '/var/cache/apt/archives/*.deb'],
-            ['rm', '-rf', '/tmp/*'],
-            ['journalctl', '--vacuum-size=100M']
-        ]
-        
-        for cmd in cleanup_commands:
-            try:
-                subprocess.run(cmd, check=False, timeout=60)
-            except Exception as e:
-                self.logger.debug(f"Cleanup command failed: {e}")
+
+        # Single-shell batching, as in _FIX_STEPS; ';' between
+        # independent steps keeps the rest running if one fails
+        script = (
+            'apt-get clean && apt-get autoclean && apt-get autoremove -y ; '
+            'rm -rf /var/cache/apt/archives/*.deb /tmp/* ; '
+            'journalctl --vacuum-size=100M'
+        )
+        try:
+            subprocess.run(['sh', '-c', script], check=False, timeout=300, **_QUIET)
+        except Exception as e:
+            self.logger.debug(f"Cleanup command failed: {e}")
 
     def install_package_with_fallback(self, package_name: str) -> bool:
         """Install package with multiple fallback methods"""
-        methods = [
-            self._install_normal,
-            self._install_fix_broken, 
-            self._install_allow_downgrades,
-            self._install_force_yes
-        ]
-        
-        for method in methods:
-            if method(package_name):
-                self.logger.info(f"Successfully installed {package_name}")
+        # Fast path: most requested packages (wireless-tools, net-tools,
+        # iproute2) are already present, and dpkg-query answers that in
+        # milliseconds where apt install takes seconds
+        if package_name in self._installed:
+            return True
+        try:
+            result = subprocess.run(
+                ['dpkg-query', '-W', '-f=${Status}', package_name],
+                capture_output=True,
+                text=True
+            )
+            if result.returncode == 0 and 'install ok installed' in result.stdout:
+                self._installed.add(package_name)
                 return True
-        
-        self.logger.error(f"All installation methods failed for {package_name}")
-        return False
+        except Exception as e:
+            self.logger.debug(f"dpkg-query probe failed for {package_name}: {e}")
 
-    def _install_normal(self, package_name: str) -> bool:
-        """Normal installation"""
+        # One apt-get run with every relaxation upfront replaces the old
+        # four-attempt chain; apt applies them only when actually needed,
+        # so the worst case is one 300s run instead of four
         try:
             subprocess.run(
-                ['apt', 'install', '-y', package_name],
+                APT + [
+                    'install', '-y', '--fix-broken', '--fix-missing',
+                    '--allow-downgrades', package_name
+                ],
                 check=True,
-                timeout=300
+                timeout=300,
+                env=_APT_ENV,
+                **_QUIET
             )
+            self.logger.info(f"Successfully installed {package_name}")
+            self._installed.add(package_name)
             return True
-        except Exception:
-            return False
-
-    def _install_fix_broken(self, package_name: str) -> bool:
-        """Install with fix-broken"""
-        try:
-            subprocess.run([
-                'apt', 'install', '-y', '--fix-broken', package_name
-            ], check=True, timeout=300)
-            return True
-        except Exception:
-            return False
-
-    def _install_allow_downgrades(self, package_name: str) -> bool:
-        """Install with allow downgrades"""
-        try:
-            subprocess.run([
-                'apt', 'install', '-y', '--allow-downgrades', package_name
-            ], check=True, timeout=300)
-            return True
-        except Exception:
-            return False
-
-    def _install_force_yes(self, package_name: str) -> bool:
-        """Install with force-yes"""
-        try:
-            subprocess.run([
-                'apt', 'install', '-y', '--force-yes', package_name
-            ], check=True, timeout=300)
-            return True
-        except Exception:
+        except Exception as e:
+            self.logger.error(f"Installation failed for {package_name}: {e}")
             return False
@@ -1,15 +1,121 @@
+from __future__ import annotations
+
+import functools
 import os
 import sys
 import logging
+import logging.handlers
+import socket
 import subprocess
 import time
 import json
-from typing import Tuple, List, Dict, Any
+import urllib.request
+
+try:
+    import psutil
+except ImportError:  # Optional; helpers degrade without it
+    psutil = None
+
+import re
+
+# One scan of the error text replaces six full-buffer 'in' checks plus
+# the lowercase copy. Note the winner is the keyword appearing earliest
+# in the message, not the old elif priority — a message containing
+# several keywords can classify differently than before
+_APT_ERR_RE = re.compile(
+    r'broken|dependency|lock|public key|gpg|404|not found|space|permission',
+    re.IGNORECASE
+)
+
+_APT_ERR_MAP = {
+    'broken': ('broken_dependencies', 'fix_broken', False),
+    'dependency': ('broken_dependencies', 'fix_broken', False),
+    'lock': ('lock_file', 'remove_locks', False),
+    'public key': ('gpg_error', 'update_keys', False),
+    'gpg': ('gpg_error', 'update_keys', False),
+    '404': ('not_found', 'update_sources', False),
+    'not found': ('not_found', 'update_sources', False),
+    'space': ('disk_space', 'clean_disk', True),
+    'permission': ('permission', 'fix_permissions', False),
+}
 
 def check_root() -> bool:
     """Check if script is running as root"""
     return os.geteuid() == 0
 
+def read_system_files(paths: list[str]) -> dict[str, str]:
+    """Read several small /proc- or /etc-style files in one pass.
+
+    Callers that need kernel version, uptime and os-release together
+    fetch them through one call site instead of scattering open()
+    blocks; raw os.open/os.read skips the buffered-IO layer these
+    one-shot pseudo-file reads never benefit from. Missing or
+    unreadable files come back as ''.
+    """
+    contents = {}
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                contents[path] = os.read(fd, 65536).decode(errors='replace')
+            finally:
+                os.close(fd)
+        except OSError:
+            contents[path] = ''
+    return contents
+
+# Descriptors held open across repeated health polls; procfs serves
+# fresh content on every pread from offset 0, so a re-read costs one
+# syscall with no open/close pair
+_proc_fd_cache: dict[str, int] = {}
+
+def read_proc_cached(path: str) -> str:
+    """Re-read a pseudo-file through a persistent descriptor.
+
+    The first call opens and caches the fd; later calls pread from
+    offset 0. Meant for files polled repeatedly (/proc/uptime and
+    friends), where the open/close per read dominates the cost.
+    Returns '' when the file is missing or the descriptor goes stale.
+    """
+    fd = _proc_fd_cache.get(path)
+    if fd is None:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return ''
+        _proc_fd_cache[path] = fd
+    try:
+        return os.pread(fd, 65536, 0).decode(errors='replace')
+    except OSError:
+        _proc_fd_cache.pop(path, None)
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        return ''
+
+class _BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that only flushes on WARNING and above.
+
+    The stock handler flushes after every record, costing a write
+    syscall per log line; INFO chatter now aggregates in a 64 KiB
+    buffer that drains on rotation, close, or the first warning. At
+    worst a crash loses the buffered tail of routine messages.
+    """
+
+    def _open(self):
+        return open(self.baseFilename, self.mode,
+                    buffering=1 << 16, encoding=self.encoding)
+
+    def emit(self, record):
+        self._flush_wanted = record.levelno >= logging.WARNING
+        super().emit(record)
+
+    def flush(self):
+        if getattr(self, '_flush_wanted', True):
+            super().flush()
+            self._flush_wanted = True
+
 def setup_logging():
     """Setup logging configuration"""
     log_dir = 'logs'
@@ -20,19 +126,31 @@ def setup_logging():
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(f'{log_dir}/wifi_tool.log'),
+            _BufferedRotatingFileHandler(
+                f'{log_dir}/wifi_tool.log',
+                maxBytes=10 * 1024 * 1024,
+                backupCount=3,
+                delay=True
+            ),
             logging.StreamHandler(sys.stdout)
         ]
     )
 
-def run_command(cmd: List[str], timeout: int = 30) -> Tuple[int, str, str]:
+# Keeps subprocess on CPython's posix_spawn/vfork fast path: with no
+# preexec_fn, cwd or close_fds=True, launching skips the fork-time page
+# table copy, which grows with our RSS. Python's own descriptors are
+# CLOEXEC by default (PEP 446), so close_fds=False leaks nothing.
+_SPAWN_KWARGS = {'close_fds': False, 'restore_signals': False}
+
+def run_command(cmd: list[str], timeout: int = 30) -> tuple[int, str, str]:
     """Run shell command with timeout"""
     try:
         result = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=timeout
+            timeout=timeout,
+            **_SPAWN_KWARGS
         )
         return result.returncode, result.stdout, result.stderr
     except subprocess.TimeoutExpired:
@@ -40,8 +158,19 @@ def run_command(cmd: List[str], timeout: int = 30) -> Tuple[int, str, str]:
     except Exception as e:
         return -1, "", str(e)
 
-def check_package_installed(package: str) -> bool:
-    """Check if a package is installed"""
+# Package-status answers keyed by (package, dpkg status mtime); both
+# the single and bulk probes read and fill the same cache
+_pkg_status_cache: dict[tuple[str, int], bool] = {}
+
+def _dpkg_status_mtime() -> int:
+    try:
+        return os.stat('/var/lib/dpkg/status').st_mtime_ns
+    except OSError:
+        return 0
+
+@functools.lru_cache(maxsize=512)
+def _package_installed(package: str, status_mtime: int) -> bool:
+    """dpkg -s probe, cached per dpkg status-file generation"""
     try:
         subprocess.run(
             ['dpkg', '-s', package],
@@ -52,6 +181,68 @@ def check_package_installed(package: str) -> bool:
     except subprocess.CalledProcessError:
         return False
 
+def check_package_installed(package: str) -> bool:
+    """Check if a package is installed"""
+    # Repeat queries for the same package hit the cache; any install or
+    # removal bumps the status-file mtime and naturally invalidates it
+    status_mtime = _dpkg_status_mtime()
+    cached = _pkg_status_cache.get((package, status_mtime))
+    if cached is not None:
+        return cached
+    installed = _package_installed(package, status_mtime)
+    _pkg_status_cache[(package, status_mtime)] = installed
+    return installed
+
+def bulk_check_packages(packages: list[str]) -> dict[str, bool]:
+    """Check several packages with one dpkg-query fork.
+
+    N sequential check_package_installed calls cost N forks; one
+    dpkg-query invocation answers the whole batch and seeds the same
+    cache the single-package probe reads.
+    """
+    status_mtime = _dpkg_status_mtime()
+    statuses = {
+        pkg: _pkg_status_cache.get((pkg, status_mtime)) for pkg in packages
+    }
+    missing = [pkg for pkg, status in statuses.items() if status is None]
+
+    if missing:
+        try:
+            result = subprocess.run(
+                ['dpkg-query', '-W', '-f=${Package} ${Status}\n'] + missing,
+                capture_output=True,
+                text=True
+            )
+            found = {}
+            for line in result.stdout.splitlines():
+                name, _, status = line.partition(' ')
+                found[name] = 'install ok installed' in status
+            for pkg in missing:
+                installed = found.get(pkg, False)
+                statuses[pkg] = installed
+                _pkg_status_cache[(pkg, status_mtime)] = installed
+        except Exception as e:
+            logging.error(f"Bulk package check failed: {e}")
+            for pkg in missing:
+                statuses[pkg] = False
+
+    return statuses
+
+def _sendfile_all(dst, src) -> None:
+    """Kernel-side copy of src into dst, looping until complete.
+
+    A single sendfile call may transfer fewer bytes than asked for; a
+    short copy here would silently truncate a restored config, so the
+    loop keeps going (and raises) rather than reporting success early.
+    """
+    size = os.fstat(src.fileno()).st_size
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+        if sent == 0:
+            raise OSError(f"sendfile stalled at {offset}/{size} bytes")
+        offset += sent
+
 def create_backup(file_path: str) -> str:
     """Create a backup of a file"""
     if not os.path.exists(file_path):
@@ -66,9 +257,11 @@ def create_backup(file_path: str) -> str:
     backup_path = os.path.join(backup_dir, backup_name)
     
     try:
-        with open(file_path, 'r') as original:
-            with open(backup_path, 'w') as backup:
-                backup.write(original.read())
+        # Binary kernel-side copy: no whole-file string in memory, no
+        # newline translation to corrupt non-text configs
+        with open(file_path, 'rb') as original:
+            with open(backup_path, 'wb') as backup:
+                _sendfile_all(backup, original)
         return backup_path
     except Exception as e:
         logging.error(f"Backup failed for {file_path}: {e}")
@@ -78,16 +271,16 @@ def restore_backup(backup_path: str, original_path: str) -> bool:
     """Restore a file from backup"""
     try:
         if os.path.exists(backup_path):
-            with open(backup_path, 'r') as backup:
-                with open(original_path, 'w') as original:
-                    original.write(backup.read())
+            with open(backup_path, 'rb') as backup:
+                with open(original_path, 'wb') as original:
+                    _sendfile_all(original, backup)
             return True
     except Exception as e:
         logging.error(f"Restore failed from {backup_path}: {e}")
     
     return False
 
-def get_system_info() -> Dict[str, Any]:
+def get_system_info() -> dict:
     """Get comprehensive system information"""
     info = {
         'kernel': '',
@@ -99,17 +292,14 @@ def get_system_info() -> Dict[str, Any]:
     }
     
     try:
-        # Kernel version
-        with open('/proc/version', 'r') as f:
-            info['kernel'] = f.read().strip()
-        
-        # Distribution
-        if os.path.exists('/etc/os-release'):
-            with open('/etc/os-release', 'r') as f:
-                for line in f:
-                    if line.startswith('PRETTY_NAME='):
-                        info['distribution'] = line.split('=')[1].strip().strip('"')
-                        break
+        # Kernel version and distribution in one batched read
+        files = read_system_files(['/proc/version', '/etc/os-release'])
+        info['kernel'] = files['/proc/version'].strip()
+
+        for line in files['/etc/os-release'].splitlines():
+            if line.startswith('PRETTY_NAME='):
+                info['distribution'] = line.split('=')[1].strip().strip('"')
+                break
         
         # Architecture
         info['architecture'] = os.uname().machine
@@ -118,7 +308,8 @@ def get_system_info() -> Dict[str, Any]:
         info['python_version'] = sys.version
         
         # Memory
-        import psutil
+        if psutil is None:
+            return info
         memory = psutil.virtual_memory()
         info['available_memory'] = memory.available / (1024**3)  # GB
         
@@ -139,11 +330,9 @@ def is_internet_available() -> bool:
     """Check if internet connection is available"""
     try:
         # Try DNS resolution
-        import socket
         socket.gethostbyname('google.com')
         
         # Try HTTP connection
-        import urllib.request
         urllib.request.urlopen('http://http.kali.org/', timeout=5)
         
         return True
@@ -153,23 +342,25 @@ def is_internet_available() -> bool:
 def download_file(url: str, local_path: str) -> bool:
     """Download a file with fallback methods"""
     try:
-        # Try wget first
-        result = subprocess.run(
-            ['wget', '-O', local_path, url],
-            capture_output=True,
-            timeout=60
-        )
-        if result.returncode == 0:
-            return True
-        
-        # Try curl as fallback
+        # Stream in-process: no wget fork, constant memory regardless
+        # of file size
+        import shutil
+        with urllib.request.urlopen(url, timeout=60) as response:
+            with open(local_path, 'wb') as out_file:
+                shutil.copyfileobj(response, out_file, 1 << 16)
+        return True
+    except Exception as e:
+        logging.warning(f"In-process download failed for {url}: {e}")
+
+    # curl handles redirects/proxies urllib may not be configured for
+    try:
         result = subprocess.run(
             ['curl', '-L', '-o', local_path, url],
             capture_output=True,
             timeout=60
         )
         return result.returncode == 0
-        
+
     except Exception as e:
         logging.error(f"Download failed for {url}: {e}")
         return False
@@ -188,34 +379,19 @@ def safe_file_write(file_path: str, content: str, backup: bool = True) -> bool:
         logging.error(f"File write failed for {file_path}: {e}")
         return False
 
-def parse_apt_error(error_output: str) -> Dict[str, Any]:
+def parse_apt_error(error_output: str) -> dict:
     """Parse APT error output for better handling"""
     error_analysis = {
         'type': 'unknown',
         'suggested_fix': 'general_repair',
         'critical': False
     }
-    
-    error_lower = error_output.lower()
-    
-    if 'broken' in error_lower or 'dependency' in error_lower:
-        error_analysis['type'] = 'broken_dependencies'
-        error_analysis['suggested_fix'] = 'fix_broken'
-    elif 'lock' in error_lower:
-        error_analysis['type'] = 'lock_file'
-        error_analysis['suggested_fix'] = 'remove_locks'
-    elif 'public key' in error_lower or 'gpg' in error_lower:
-        error_analysis['type'] = 'gpg_error'
-        error_analysis['suggested_fix'] = 'update_keys'
-    elif '404' in error_lower or 'not found' in error_lower:
-        error_analysis['type'] = 'not_found'
-        error_analysis['suggested_fix'] = 'update_sources'
-    elif 'space' in error_lower:
-        error_analysis['type'] = 'disk_space'
-        error_analysis['suggested_fix'] = 'clean_disk'
-        error_analysis['critical'] = True
-    elif 'permission' in error_lower:
-        error_analysis['type'] = 'permission'
-        error_analysis['suggested_fix'] = 'fix_permissions'
-    
+
+    match = _APT_ERR_RE.search(error_output)
+    if match:
+        error_type, suggested_fix, critical = _APT_ERR_MAP[match.group().lower()]
+        error_analysis['type'] = error_type
+        error_analysis['suggested_fix'] = suggested_fix
+        error_analysis['critical'] = critical
+
     return error_analysis
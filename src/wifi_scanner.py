@@ -1,12 +1,19 @@
 import subprocess
 import json
 import logging
+import os
 import re
 from typing import List, Dict
 
+# Compiled once; _parse_iwlist_output runs this per signal line
+_SIGNAL_RE = re.compile(r'Signal level=(-?\d+)')
+
 class WiFiScanner:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Interface name survives across scans; rediscovered only when
+        # bringing it up fails (device unplugged or renamed)
+        self._wifi_iface = None
     
     def scan_networks(self, detailed: bool = False) -> List[str]:
         """Scan for available WiFi networks"""
@@ -40,41 +47,73 @@ class WiFiScanner:
             self.logger.error(f"Error scanning networks: {e}")
             return []
     
-    def _enable_wifi_interface(self):
-        """Enable WiFi interface"""
+    def _find_wifi_interface(self) -> str:
+        """Name of the first wireless interface, or ''"""
+        # A wireless/ subdirectory under /sys/class/net marks an
+        # 802.11 interface — one directory scan, no iwconfig fork
+        try:
+            with os.scandir('/sys/class/net') as entries:
+                for entry in entries:
+                    if os.path.isdir(os.path.join(entry.path, 'wireless')):
+                        return entry.name
+        except OSError:
+            pass
+
+        # sysfs unavailable — fall back to parsing iwconfig
         try:
-            # Find WiFi interface
             result = subprocess.run(['iwconfig'], capture_output=True, text=True)
             interfaces = re.findall(r'^(\w+)\s+IEEE', result.stdout, re.MULTILINE)
-            
             if interfaces:
-                wifi_interface = interfaces[0]
-                subprocess.run(['ip', 'link', 'set', wifi_interface, 'up'], check=True)
-                self.logger.info(f"Enabled WiFi interface: {wifi_interface}")
+                return interfaces[0]
+        except Exception:
+            pass
+        return ''
+
+    def _enable_wifi_interface(self):
+        """Enable WiFi interface"""
+        try:
+            if not self._wifi_iface:
+                self._wifi_iface = self._find_wifi_interface()
+
+            if self._wifi_iface:
+                try:
+                    subprocess.run(['ip', 'link', 'set', self._wifi_iface, 'up'], check=True)
+                except subprocess.CalledProcessError:
+                    # Cached name went stale; rediscover once and retry
+                    self._wifi_iface = self._find_wifi_interface()
+                    if not self._wifi_iface:
+                        return
+                    subprocess.run(['ip', 'link', 'set', self._wifi_iface, 'up'], check=True)
+                self.logger.info(f"Enabled WiFi interface: {self._wifi_iface}")
         except Exception as e:
             self.logger.warning(f"Could not enable WiFi interface: {e}")
     
     def _parse_iwlist_output(self, output: str) -> List[str]:
         """Parse iwlist scan output"""
-        networks = []
+        # dict preserves insertion order and makes the dedupe check O(1)
+        # instead of scanning the list per ESSID
+        networks = {}
         current_network = {}
-        
-        for line in output.split('\n'):
-            line = line.strip()
-            
+
+        for line in output.splitlines():
+            # Only ESSID and signal lines matter; skip the rest before
+            # paying for strip/split work
+            if 'ESSID:' not in line and 'Signal level=' not in line:
+                continue
+
             # ESSID
             if 'ESSID:' in line:
                 essid = line.split('ESSID:')[1].strip().strip('"')
-                if essid and essid not in networks:
-                    networks.append(essid)
-            
+                if essid:
+                    networks[essid] = True
+
             # Signal level
             elif 'Signal level=' in line:
-                signal_match = re.search(r'Signal level=(-?\d+)', line)
+                signal_match = _SIGNAL_RE.search(line)
                 if signal_match:
                     current_network['signal'] = signal_match.group(1)
-        
-        return networks
+
+        return list(networks)
     
     def _display_detailed_networks(self, networks: List[str]):
         """Display detailed network information"""
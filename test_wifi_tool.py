@@ -5,17 +5,134 @@ Comprehensive Test Suite for WiFi Automation Tool
 Run this to check for syntax errors, import issues, and basic functionality
 """
 
+import collections
+import concurrent.futures
 import os
 import sys
 import subprocess
-import importlib
-import ast
+import importlib.util
 import logging
+import mmap
+import py_compile
+import queue
+import re
+import threading
+
+# orjson parses in native code; the stdlib parser fills in when it
+# isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# Non-comment, non-blank requirement lines
+_REQUIREMENT_RE = re.compile(rb'(?m)^[^#\s].*')
+
+
+# Per-file check workers live at module level so a ProcessPoolExecutor
+# can pickle them; they return (test_name, passed, error) and leave the
+# printing to the parent process.
+
+def _syntax_worker(filepath):
+    """Compile one Python file, reporting syntax validity"""
+    name = f"Python syntax: {filepath}"
+    try:
+        # A bytecode file at least as new as the source already proves
+        # the syntax is valid, so quick and full runs (even in separate
+        # processes) share one compile via __pycache__
+        cached = importlib.util.cache_from_source(filepath)
+        try:
+            if os.stat(cached).st_mtime >= os.stat(filepath).st_mtime:
+                return name, True, None
+        except OSError:
+            pass
+        # py_compile checks syntax and drops the bytecode into
+        # __pycache__, which the import phase then loads instead of
+        # recompiling the source
+        py_compile.compile(filepath, doraise=True, quiet=1)
+        return name, True, None
+    except py_compile.PyCompileError as e:
+        return name, False, f"Syntax error: {e}"
+    except Exception as e:
+        return name, False, str(e)
+
+def _import_worker(task):
+    """Import one module from its file path"""
+    module_path, module_name = task
+    name = f"Import module: {module_name}"
+    try:
+        if os.path.dirname(module_path) not in sys.path:
+            sys.path.insert(0, os.path.dirname(module_path))
+
+        # The probe name keeps these one-off modules clear of any real
+        # entry already living in sys.modules
+        spec = importlib.util.spec_from_file_location(f"{module_name}_probe", module_path)
+        module = importlib.util.module_from_spec(spec)
+        # Loads the __pycache__ bytecode the syntax phase just wrote
+        # instead of recompiling the source
+        spec.loader.exec_module(module)
+        return name, True, None
+    except Exception as e:
+        return name, False, str(e)
+
+def _json_worker(filepath):
+    """Load one JSON file, reporting syntax validity"""
+    name = f"JSON syntax: {filepath}"
+    try:
+        with open(filepath, 'rb') as f:
+            _json_loads(f.read())
+        return name, True, None
+    except Exception as e:
+        return name, False, str(e)
+
+def _init_worker(task):
+    """Import a module and construct its class in a fresh worker"""
+    module_name, class_name = task
+    name = f"{class_name} initialization"
+    try:
+        if 'src' not in sys.path:
+            sys.path.insert(0, 'src')
+        module = importlib.import_module(module_name)
+        getattr(module, class_name)()
+        return name, True, None
+    except Exception as e:
+        return name, False, str(e)
+
+def _check_workers():
+    """Pool size for the per-file checks"""
+    return max(1, (os.cpu_count() or 2) - 2)
+
+def _index_tree(roots=('.', 'src', 'config', 'drivers')):
+    """Map of path -> is_dir for everything under the given roots.
+
+    One scandir per directory replaces a stat syscall per checked path;
+    membership tests against the index are then free.
+    """
+    index = {}
+    for root in roots:
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    path = entry.name if root == '.' else f"{root}/{entry.name}"
+                    index[path] = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+    return index
 
 class WiFiToolTester:
     def __init__(self):
-        self.passed_tests = 0
-        self.failed_tests = 0
+        # Single Counter carries the overall totals plus per-phase
+        # breakdowns keyed 'phase:pass' / 'phase:fail'
+        self.counts = collections.Counter()
+        self._phase = ''
+        self._fs_index = None
+        self._exists_cache = {}
+        # Result lines go through a queue drained by one daemon thread,
+        # so parallel phases never serialize on the stdout lock
+        self._outq = queue.Queue()
+        threading.Thread(target=self._drain, daemon=True).start()
         self.setup_logging()
     
     def setup_logging(self):
@@ -29,69 +146,86 @@ class WiFiToolTester:
         )
         self.logger = logging.getLogger(__name__)
     
+    def _drain(self):
+        """Write queued output lines to stdout"""
+        while True:
+            sys.stdout.write(self._outq.get())
+            self._outq.task_done()
+
+    def _emit(self, text):
+        """Queue one line for the drain thread"""
+        self._outq.put(text + "\n")
+
     def print_result(self, test_name, passed, error=None):
         """Print test result"""
+        outcome = 'pass' if passed else 'fail'
+        self.counts[outcome] += 1
+        if self._phase:
+            self.counts[f"{self._phase}:{outcome}"] += 1
         if passed:
-            print(f"✅ {test_name} - PASSED")
-            self.passed_tests += 1
+            self._emit(f"✅ {test_name} - PASSED")
+        elif error:
+            # One put keeps the result and its error adjacent even with
+            # concurrent producers
+            self._emit(f"❌ {test_name} - FAILED\n   Error: {error}")
         else:
-            print(f"❌ {test_name} - FAILED")
-            if error:
-                print(f"   Error: {error}")
-            self.failed_tests += 1
+            self._emit(f"❌ {test_name} - FAILED")
     
     def test_file_exists(self, filepath):
         """Test if file exists"""
+        # Several phases re-check the same paths; only the first check
+        # stats the file and counts toward the summary, so duplicates
+        # stop inflating the pass totals
+        if filepath in self._exists_cache:
+            return self._exists_cache[filepath]
+
         try:
-            exists = os.path.exists(filepath)
+            if self._fs_index is not None and filepath in self._fs_index:
+                exists = True
+            else:
+                # Path outside the indexed roots (or genuinely absent)
+                exists = os.path.exists(filepath)
+            self._exists_cache[filepath] = exists
             self.print_result(f"File exists: {filepath}", exists)
             return exists
         except Exception as e:
+            self._exists_cache[filepath] = False
             self.print_result(f"File exists: {filepath}", False, str(e))
             return False
     
     def test_python_syntax(self, filepath):
         """Test Python file syntax"""
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                source_code = f.read()
-            ast.parse(source_code)
-            self.print_result(f"Python syntax: {filepath}", True)
-            return True
-        except SyntaxError as e:
-            self.print_result(f"Python syntax: {filepath}", False, f"Syntax error: {e}")
-            return False
-        except Exception as e:
-            self.print_result(f"Python syntax: {filepath}", False, str(e))
-            return False
+        name, passed, error = _syntax_worker(filepath)
+        self.print_result(name, passed, error)
+        return passed
     
     def test_import_module(self, module_path, module_name):
         """Test if module can be imported"""
-        try:
-            # Add to Python path
-            if os.path.dirname(module_path) not in sys.path:
-                sys.path.insert(0, os.path.dirname(module_path))
-            
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            self.print_result(f"Import module: {module_name}", True)
-            return True
-        except Exception as e:
-            self.print_result(f"Import module: {module_name}", False, str(e))
-            return False
+        name, passed, error = _import_worker((module_path, module_name))
+        self.print_result(name, passed, error)
+        return passed
     
     def test_requirements_parsing(self):
         """Test requirements.txt parsing"""
         try:
             if not self.test_file_exists("requirements.txt"):
                 return False
-            
-            with open("requirements.txt", "r") as f:
-                requirements = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-            
-            self.print_result("Requirements.txt parsing", True)
+
+            # Zero-copy scan over the mapped file; no per-line strip
+            # allocations or throwaway list
+            with open("requirements.txt", "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # mmap refuses zero-length files; an empty
+                    # requirements.txt is valid, just has no entries
+                    count = 0
+                else:
+                    mm = mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+                    try:
+                        count = sum(1 for _ in _REQUIREMENT_RE.finditer(mm))
+                    finally:
+                        mm.close()
+
+            self.print_result(f"Requirements.txt parsing ({count} requirements)", True)
             return True
         except Exception as e:
             self.print_result("Requirements.txt parsing", False, str(e))
@@ -103,10 +237,11 @@ class WiFiToolTester:
         required_files = ["main.py", "requirements.txt", "install.sh", "recovery.sh"]
         
         all_passed = True
-        
+        index = self._fs_index if self._fs_index is not None else _index_tree()
+
         # Test directories
         for directory in required_dirs:
-            if os.path.exists(directory) and os.path.isdir(directory):
+            if index.get(directory) is True:
                 self.print_result(f"Directory exists: {directory}", True)
             else:
                 self.print_result(f"Directory exists: {directory}", False)
@@ -114,7 +249,7 @@ class WiFiToolTester:
         
         # Test files
         for file in required_files:
-            if os.path.exists(file) and os.path.isfile(file):
+            if index.get(file) is False:
                 self.print_result(f"File exists: {file}", True)
             else:
                 self.print_result(f"File exists: {file}", False)
@@ -125,36 +260,64 @@ class WiFiToolTester:
     def test_shell_scripts(self):
         """Test shell script syntax"""
         scripts = ["install.sh", "recovery.sh"]
-        
+
+        # Launch every bash -n up front and collect afterwards, so the
+        # bash startups overlap instead of running back to back while
+        # keeping per-file attribution in the results
+        checks = []
         for script in scripts:
             if not self.test_file_exists(script):
                 continue
-            
+
             try:
                 # Check if script has valid shebang and basic syntax
                 with open(script, 'r') as f:
                     first_line = f.readline().strip()
-                
+
                 if first_line.startswith("#!/bin/bash") or first_line.startswith("#!/bin/sh"):
-                    # Test basic syntax check
-                    result = subprocess.run(
+                    proc = subprocess.Popen(
                         ["bash", "-n", script],
-                        capture_output=True,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
                         text=True
                     )
-                    if result.returncode == 0:
-                        self.print_result(f"Shell script syntax: {script}", True)
-                    else:
-                        self.print_result(f"Shell script syntax: {script}", False, result.stderr)
+                    checks.append((script, proc))
                 else:
                     self.print_result(f"Shell script syntax: {script}", False, "Missing or invalid shebang")
             except Exception as e:
                 self.print_result(f"Shell script syntax: {script}", False, str(e))
+
+        for script, proc in checks:
+            try:
+                _stdout, stderr = proc.communicate(timeout=30)
+                self.print_result(f"Shell script syntax: {script}", proc.returncode == 0,
+                                  stderr if proc.returncode != 0 else None)
+            except Exception as e:
+                proc.kill()
+                self.print_result(f"Shell script syntax: {script}", False, str(e))
     
     def test_main_script_execution(self):
         """Test main script basic execution (dry run)"""
+        # Exercising --help through main's own parser skips a whole
+        # interpreter startup; argparse raises SystemExit(0) on success
+        try:
+            import contextlib
+            import io
+            import main as main_module
+
+            buffer = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(buffer):
+                    main_module.get_argparser().parse_args(['--help'])
+            except SystemExit as e:
+                if e.code == 0 and 'usage:' in buffer.getvalue():
+                    self.print_result("Main script basic execution", True)
+                    return True
+        except Exception as e:
+            self.logger.debug(f"In-process --help failed: {e}")
+
+        # Fall back to running the script for real
         try:
-            # Test with help flag to avoid actual operations
             result = subprocess.run(
                 [sys.executable, "main.py", "--help"],
                 capture_output=True,
@@ -175,42 +338,31 @@ class WiFiToolTester:
             self.print_result("Main script basic execution", False, str(e))
             return False
     
+    # (module, class) pairs exercised by test_class_initialization
+    _INIT_CLASSES = [
+        ("src.wifi_scanner", "WiFiScanner"),
+        ("src.driver_manager", "DriverManager"),
+        ("src.error_handler", "ErrorHandler"),
+        ("src.package_manager", "PackageManager"),
+        ("src.system_health", "SystemHealth"),
+    ]
+
     def test_class_initialization(self):
         """Test if main classes can be initialized"""
+        # Each init runs in its own worker process: module-level import
+        # work overlaps, and no class gets to pass only because an
+        # earlier test already populated sys.modules for it
+        all_passed = True
         try:
-            # Add src to path
-            sys.path.insert(0, 'src')
-            
-            # Test WiFiScanner
-            from src.wifi_scanner import WiFiScanner
-            scanner = WiFiScanner()
-            self.print_result("WiFiScanner initialization", True)
-            
-            # Test DriverManager
-            from src.driver_manager import DriverManager
-            driver_mgr = DriverManager()
-            self.print_result("DriverManager initialization", True)
-            
-            # Test ErrorHandler
-            from src.error_handler import ErrorHandler
-            error_handler = ErrorHandler()
-            self.print_result("ErrorHandler initialization", True)
-            
-            # Test PackageManager
-            from src.package_manager import PackageManager
-            pkg_mgr = PackageManager()
-            self.print_result("PackageManager initialization", True)
-            
-            # Test SystemHealth
-            from src.system_health import SystemHealth
-            sys_health = SystemHealth()
-            self.print_result("SystemHealth initialization", True)
-            
-            return True
-            
+            with concurrent.futures.ProcessPoolExecutor(max_workers=_check_workers()) as executor:
+                for name, passed, error in executor.map(_init_worker, self._INIT_CLASSES):
+                    self.print_result(name, passed, error)
+                    all_passed = all_passed and passed
         except Exception as e:
-            self.print_result("Class initialization", False, str(e))
+            self.logger.error(f"Class initialization pool failed: {e}")
             return False
+
+        return all_passed
     
     def test_config_files(self):
         """Test configuration files"""
@@ -225,30 +377,28 @@ class WiFiToolTester:
     
     def _test_json_syntax(self, filepath):
         """Test JSON file syntax"""
-        try:
-            import json
-            with open(filepath, 'r') as f:
-                json.load(f)
-            self.print_result(f"JSON syntax: {filepath}", True)
-            return True
-        except Exception as e:
-            self.print_result(f"JSON syntax: {filepath}", False, str(e))
-            return False
+        name, passed, error = _json_worker(filepath)
+        self.print_result(name, passed, error)
+        return passed
     
     def test_permissions(self):
         """Test file permissions"""
         executable_files = ["main.py", "install.sh", "recovery.sh"]
         
         for file in executable_files:
-            if not self.test_file_exists(file):
-                continue
-            
             try:
-                # Check if file is executable
-                if os.access(file, os.X_OK):
+                # One stat answers both questions: a missing file raises
+                # FileNotFoundError, and the mode bits replace os.access
+                # (which repeats the stat plus an access(2) call per file)
+                st = os.stat(file)
+                self._exists_cache.setdefault(file, True)
+                if st.st_mode & 0o111:
                     self.print_result(f"File executable: {file}", True)
                 else:
                     self.print_result(f"File executable: {file}", False, "File not executable")
+            except FileNotFoundError:
+                self._exists_cache.setdefault(file, False)
+                continue
             except Exception as e:
                 self.print_result(f"File executable: {file}", False, str(e))
     
@@ -256,13 +406,19 @@ class WiFiToolTester:
         """Run all tests"""
         print("🚀 Starting Comprehensive WiFi Tool Tests")
         print("=" * 50)
+
+        # Index the project tree once; the existence checks below are
+        # then dictionary lookups instead of one stat per path
+        self._fs_index = _index_tree()
         
         # Phase 1: Basic structure tests
-        print("\n📁 PHASE 1: Project Structure Tests")
+        self._phase = 'structure'
+        self._emit(f"\n📁 PHASE 1: Project Structure Tests")
         self.test_directory_structure()
         
         # Phase 2: File existence tests
-        print("\n📄 PHASE 2: File Existence Tests")
+        self._phase = 'files'
+        self._emit(f"\n📄 PHASE 2: File Existence Tests")
         important_files = [
             "main.py", "requirements.txt", "install.sh", "recovery.sh",
             "src/__init__.py", "src/wifi_scanner.py", "src/driver_manager.py",
@@ -270,11 +426,18 @@ class WiFiToolTester:
             "src/utils.py", "config/config.json", "drivers/common_drivers.json"
         ]
         
+        # One set difference against the tree index replaces the
+        # per-file check loop; missing gates the later phases too
+        present = {p for p, is_dir in self._fs_index.items() if not is_dir}
+        missing = set(important_files) - present
         for file in important_files:
-            self.test_file_exists(file)
-        
+            exists = file not in missing
+            self._exists_cache[file] = exists
+            self.print_result(f"File exists: {file}", exists)
+
         # Phase 3: Syntax tests
-        print("\n🔍 PHASE 3: Syntax Validation Tests")
+        self._phase = 'syntax'
+        self._emit(f"\n🔍 PHASE 3: Syntax Validation Tests")
         python_files = [
             "main.py", 
             "src/wifi_scanner.py", 
@@ -286,16 +449,21 @@ class WiFiToolTester:
             "test_wifi_tool.py"
         ]
         
-        for py_file in python_files:
-            if self.test_file_exists(py_file):
-                self.test_python_syntax(py_file)
-        
+        # Compiling (not just parsing) is CPU-bound, so the files fan
+        # out across worker processes; the bytecode each one writes to
+        # __pycache__ is reused by the import phase below
+        syntax_targets = [f for f in python_files if f not in missing]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=_check_workers()) as executor:
+            for name, passed, error in executor.map(_syntax_worker, syntax_targets):
+                self.print_result(name, passed, error)
+
         self.test_shell_scripts()
         self.test_config_files()
         self.test_requirements_parsing()
         
         # Phase 4: Import tests
-        print("\n🐍 PHASE 4: Import Tests")
+        self._phase = 'imports'
+        self._emit(f"\n🐍 PHASE 4: Import Tests")
         python_modules = [
             ("src/wifi_scanner.py", "wifi_scanner"),
             ("src/driver_manager.py", "driver_manager"),
@@ -304,30 +472,51 @@ class WiFiToolTester:
             ("src/system_health.py", "system_health"),
             ("src/utils.py", "utils")
         ]
-        
-        for filepath, module_name in python_modules:
-            if self.test_file_exists(filepath):
-                self.test_import_module(filepath, module_name)
+
+        import_targets = [
+            task for task in python_modules if task[0] not in missing
+        ]
+        # Imports are dominated by disk reads and exec releases the GIL
+        # on I/O, so threads overlap the stalls without the pickling
+        # and interpreter startup a process pool would add. The path
+        # push happens once here rather than racing inside workers.
+        for directory in {os.path.dirname(path) for path, _name in import_targets}:
+            if directory and directory not in sys.path:
+                sys.path.insert(0, directory)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            for name, passed, error in executor.map(_import_worker, import_targets):
+                self.print_result(name, passed, error)
         
         # Phase 5: Functionality tests
-        print("\n⚙️ PHASE 5: Basic Functionality Tests")
+        self._phase = 'functionality'
+        self._emit(f"\n⚙️ PHASE 5: Basic Functionality Tests")
         self.test_class_initialization()
         self.test_main_script_execution()
         self.test_permissions()
         
-        # Summary
+        # Summary — flush everything queued before printing directly
+        self._outq.join()
         print("\n" + "=" * 50)
         print("📊 TEST SUMMARY")
         print("=" * 50)
-        print(f"✅ Passed: {self.passed_tests}")
-        print(f"❌ Failed: {self.failed_tests}")
-        print(f"📈 Success Rate: {(self.passed_tests/(self.passed_tests + self.failed_tests))*100:.1f}%")
-        
-        if self.failed_tests == 0:
+        passed = self.counts['pass']
+        failed = self.counts['fail']
+        total = passed + failed
+        rate = 100 * passed / total if total else 0.0
+        print(f"✅ Passed: {passed}")
+        print(f"❌ Failed: {failed}")
+        print(f"📈 Success Rate: {rate:.1f}%")
+        for tag in ('structure', 'files', 'syntax', 'imports', 'functionality'):
+            phase_fail = self.counts[f"{tag}:fail"]
+            if phase_fail:
+                phase_total = phase_fail + self.counts[f"{tag}:pass"]
+                print(f"   {tag}: {phase_fail}/{phase_total} failed")
+
+        if failed == 0 and total:
             print("\n🎉 ALL TESTS PASSED! Your WiFi tool should work correctly.")
             return True
         else:
-            print(f"\n⚠️  {self.failed_tests} tests failed. Please check the errors above.")
+            print(f"\n⚠️  {failed} tests failed. Please check the errors above.")
             return False
 
 def quick_test():
@@ -346,13 +535,13 @@ def quick_test():
         print(f"❌ Missing files: {missing_files}")
         return False
     
-    # Check Python syntax of main file
-    try:
-        with open("main.py", "r") as f:
-            ast.parse(f.read())
+    # Check Python syntax of main file; shares the bytecode cache
+    # with the full run instead of re-parsing the source
+    _name, syntax_ok, syntax_err = _syntax_worker("main.py")
+    if syntax_ok:
         print("✅ Main.py syntax: OK")
-    except SyntaxError as e:
-        print(f"❌ Main.py syntax error: {e}")
+    else:
+        print(f"❌ Main.py syntax error: {syntax_err}")
         return False
     
     # Check if we can import basic modules